@@ -0,0 +1,6 @@
+from dotenv import load_dotenv
+
+# Load the .env file exactly once for the whole conf package. The other conf
+# modules import this module instead of calling load_dotenv() themselves, so
+# the file is read and parsed a single time regardless of import order.
+load_dotenv()
@@ -1,8 +1,5 @@
 import os
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
+from . import _env  # noqa: F401
 
 FRIENDTECH_BACKEND = os.getenv('FRIENDTECH_BACKEND')
-TWITTERSCORE_KEY = os.getenv('TWITTERSCORE_KEY')
\ No newline at end of file
+TWITTERSCORE_KEY = os.getenv('TWITTERSCORE_KEY')
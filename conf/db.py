@@ -1,8 +1,5 @@
 import os
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
+from . import _env  # noqa: F401
 
 # get database configurations
 DATABASE = {
@@ -12,4 +9,4 @@ DATABASE = {
     'PORT': os.getenv('POSTGRES_PORT'),
     'NAME': os.getenv('POSTGRES_DB'),
 }
-DATABASE_URL=f"postgresql://{DATABASE['USERNAME']}:{DATABASE['PASSWORD']}@{DATABASE['HOST']}:{DATABASE['PORT']}/{DATABASE['NAME']}"
\ No newline at end of file
+DATABASE_URL=f"postgresql://{DATABASE['USERNAME']}:{DATABASE['PASSWORD']}@{DATABASE['HOST']}:{DATABASE['PORT']}/{DATABASE['NAME']}"
@@ -1,8 +1,12 @@
+import asyncio
 import asyncpg
+import logging
 from typing import Optional, AsyncGenerator
 from asyncpg import Connection, Pool
 from contextlib import asynccontextmanager
 
+logger = logging.getLogger(__name__)
+
 
 class Database:
     """PostgreSQL Database initializer using asyncpg"""
@@ -10,22 +14,79 @@ class Database:
     def __init__(self, database_url: str) -> None:
         self._conn_str = database_url
         self.pool: Optional[Pool] = None
+        self._prepared_conn: Optional[Connection] = None
+        self._prepared_statements: dict = {}
+        self._prepared_lock = asyncio.Lock()
+        self._ops: dict = {}
     
     async def connect(self) -> None:
         """Establish a connection to the database"""
         if self.pool is None:
             try:
-                self.pool = await asyncpg.create_pool(dsn=self._conn_str)
-                print("Database connection established")
+                self.pool = await asyncpg.create_pool(
+                    dsn=self._conn_str,
+                    min_size=5,
+                    max_size=20,
+                    max_queries=50000,
+                    max_inactive_connection_lifetime=300,
+                    # Large enough to keep every dynamic INSERT/UPDATE form
+                    # prepared on the connection
+                    statement_cache_size=2048,
+                    command_timeout=30,
+                    # The workload is short OLTP-style queries; PG's JIT only
+                    # adds plan-time latency to those
+                    server_settings={'jit': 'off'},
+                )
+                # Bind the pool methods once so _execute is a dict lookup
+                # instead of a getattr per query
+                self._ops = {
+                    'fetch': self.pool.fetch,
+                    'fetchrow': self.pool.fetchrow,
+                    'fetchval': self.pool.fetchval,
+                    'execute': self.pool.execute,
+                    'executemany': self.pool.executemany,
+                }
+                logger.info("Database connection established")
             except Exception as e:
-                print(f"Unable to connect to the database: {e}")
+                logger.error("Unable to connect to the database: %s", e)
                 raise e
-    
+
     async def close(self) -> None:
         """Close the connections in the pool"""
         if self.pool:
+            if self._prepared_conn is not None:
+                await self.pool.release(self._prepared_conn)
+                self._prepared_conn = None
+                self._prepared_statements.clear()
             await self.pool.close()
-            print("Database connection closed")
+            logger.info("Database connection closed")
+
+    async def prepare_once(self, name: str, query: str):
+        """Return a cached prepared statement, preparing it on first use
+
+        asyncpg prepared statements are bound to a single connection, so the
+        statements are kept on one connection pinned from the pool for the
+        lifetime of the Database. Hot recurring queries re-issued through the
+        returned statement skip the server-side parse/plan instead of landing
+        on whichever connection the pool hands out next. If the pinned
+        connection dies (server restart, idle disconnect), it is released
+        and everything is re-prepared on a fresh one.
+        """
+        assert self.pool is not None, "Connection pool is not established"
+        # The lock keeps concurrent first calls from each acquiring (and
+        # leaking) their own pinned connection.
+        async with self._prepared_lock:
+            if self._prepared_conn is not None and self._prepared_conn.is_closed():
+                await self.pool.release(self._prepared_conn)
+                self._prepared_conn = None
+                self._prepared_statements.clear()
+            if self._prepared_conn is None:
+                self._prepared_conn = await self.pool.acquire()
+            statement = self._prepared_statements.get(name)
+            if statement is None:
+                statement = await self._prepared_conn.prepare(query)
+                self._prepared_statements[name] = statement
+            return statement
     
     @asynccontextmanager
     async def get_connection(self) -> AsyncGenerator[Connection, None]:
@@ -50,25 +111,39 @@ class Database:
                 yield conn
             except Exception as e:
                 await tx.rollback()
-                print(f"Transaction failed and rolled back: {e}")
+                logger.error("Transaction failed and rolled back: %s", e)
                 raise
             else:
                 await tx.commit()
 
     async def _execute(self, operation: str, query: str, *args, **kwargs):
         """Private method to execute database operations."""
-        async with self.get_connection() as conn:
-            try:
-                operation_func = getattr(conn, operation)
-                return await operation_func(query, *args, **kwargs)
-            except Exception as e:
-                print(f"Error during database operation ({operation}): {e}")
-                raise
+        # The pool methods acquire and release a connection internally, which
+        # is cheaper than going through the get_connection() context manager
+        # for every short query. get_connection() remains for callers that
+        # need to hold a raw connection (e.g. the transaction path).
+        assert self._ops, "Connection pool is not established"
+        try:
+            return await self._ops[operation](query, *args, **kwargs)
+        except Exception as e:
+            logger.error("Error during database operation (%s): %s", operation, e)
+            raise
     
+    async def copy_records(self, table: str, columns, records):
+        """Bulk-insert records into a table using the COPY protocol."""
+        async with self.get_connection() as conn:
+            return await conn.copy_records_to_table(table, records=records, columns=columns)
+
     async def fetch_all(self, query: str, *args):
         """Fetch multiple rows from the database."""
         return await self._execute('fetch', query, *args)
 
+    async def fetch_column(self, query: str, *args, column: int = 0):
+        """Fetch a single column from every row of a query result."""
+        rows = await self._execute('fetch', query, *args)
+        # Positional access skips the per-row key lookup on the Record
+        return [row[column] for row in rows]
+
     async def fetch_row(self, query: str, *args):
         """Fetch a single row from the database."""
         return await self._execute('fetchrow', query, *args)
@@ -4,12 +4,12 @@ CREATE TABLE shares (
     address BYTEA NOT NULL UNIQUE,
     twitter_username TEXT,
     twitter_name TEXT,
-    twitter_score NUMERIC,
+    twitter_score DOUBLE PRECISION,
     registered BIGINT NOT NULL,
     last_transaction BIGINT NOT NULL,
-    balance NUMERIC NOT NULL,
-    buy_price NUMERIC NOT NULL DEFAULT 0,
-    sell_price NUMERIC NOT NULL DEFAULT 0,
+    balance NUMERIC(78,0) NOT NULL,
+    buy_price NUMERIC(78,0) NOT NULL DEFAULT 0,
+    sell_price NUMERIC(78,0) NOT NULL DEFAULT 0,
     supply INTEGER NOT NULL DEFAULT 1,
     rank BIGINT
 );
@@ -20,9 +20,9 @@ CREATE TABLE trades (
     subject BYTEA NOT NULL,
     is_buy BOOLEAN NOT NULL,
     share_amount INTEGER NOT NULL,
-    eth_amount NUMERIC NOT NULL,
-    protocol_eth_amount NUMERIC NOT NULL,
-    subject_eth_amount NUMERIC NOT NULL,
+    eth_amount NUMERIC(78,0) NOT NULL,
+    protocol_eth_amount NUMERIC(78,0) NOT NULL,
+    subject_eth_amount NUMERIC(78,0) NOT NULL,
     supply INTEGER NOT NULL,
     transaction_hash BYTEA NOT NULL UNIQUE,
     block_number BIGINT NOT NULL,
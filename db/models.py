@@ -1,69 +1,148 @@
 from typing import Optional
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, ConfigDict, field_validator
 from decimal import Decimal
 from hexbytes import HexBytes
 
 
 class Share(BaseModel):
+    # The twitter fields are assigned after construction straight from API
+    # payloads, so assignments re-run the validators to coerce whatever the
+    # APIs return. Trusted DB rows still bypass validation via from_record.
+    model_config = ConfigDict(validate_assignment=True)
+
     address: bytes
     twitter_username: Optional[str] = None
     twitter_name: Optional[str] = None
     twitter_score: Optional[float] = None
     registered: Optional[int] = None
     last_transaction: int
-    balance: Decimal
-    buy_price: Decimal
-    sell_price: Decimal
+    balance: int
+    buy_price: int
+    sell_price: int
     supply: int
     rank: Optional[int] = None
 
-    class Config:
-        validate_assignment = True
-
-    @validator('address', pre=True)
+    @field_validator('address', mode='before')
+    @classmethod
     def validate_bytes(cls, v):
         return convert_to_bytes(v)
-        
-    @validator('registered', 'last_transaction', 'supply', 'rank', pre=True)
+
+    @field_validator('registered', 'last_transaction', 'balance', 'buy_price', 'sell_price', 'supply', 'rank', mode='before')
+    @classmethod
     def validate_int(cls, v):
         if v is not None:
             return convert_to_int(v)
         return v
-    
-    @validator('balance', 'buy_price', 'sell_price', pre=True)
-    def validate_decimal(cls, v):
-        return convert_to_decimal(v)
-    
+
+    @classmethod
+    def from_record(cls, record) -> "Share":
+        """Build a Share from an asyncpg Record without re-validation
+
+        The database is a trusted source, so model_construct skips the
+        validator stack and the **dict key re-hashing; only the NUMERIC
+        wei columns need an explicit int() since asyncpg decodes them as
+        Decimal. The positional indices must match the column order
+        selected by db.operations (which selects the model fields in
+        declaration order).
+        """
+        return cls.model_construct(
+            address=record[0],
+            twitter_username=record[1],
+            twitter_name=record[2],
+            twitter_score=record[3],
+            registered=record[4],
+            last_transaction=record[5],
+            balance=int(record[6]),
+            buy_price=int(record[7]),
+            sell_price=int(record[8]),
+            supply=record[9],
+            rank=record[10],
+        )
+
 
 class Trade(BaseModel):
     trader: bytes
     subject: bytes
     is_buy: bool
     share_amount: int
-    eth_amount: Decimal
-    protocol_eth_amount: Decimal
-    subject_eth_amount: Decimal
+    eth_amount: int
+    protocol_eth_amount: int
+    subject_eth_amount: int
     supply: int
     transaction_hash: bytes
     block_number: int
     timestamp: int
 
-    @validator('trader', 'subject', 'transaction_hash', pre=True)
+    @field_validator('trader', 'subject', 'transaction_hash', mode='before')
+    @classmethod
     def validate_bytes(cls, v):
         return convert_to_bytes(v)
 
-    @validator('share_amount', 'supply', 'block_number', 'timestamp', pre=True)
+    @field_validator('share_amount', 'eth_amount', 'protocol_eth_amount', 'subject_eth_amount', 'supply', 'block_number', 'timestamp', mode='before')
+    @classmethod
     def validate_int(cls, v):
         return convert_to_int(v)
-    
-    @validator('eth_amount', 'protocol_eth_amount', 'subject_eth_amount', pre=True)
-    def validate_decimal(cls, v):
-        return convert_to_decimal(v)
 
-def convert_to_bytes(value):
-    if isinstance(value, str) and value.startswith("0x"):
+    @classmethod
+    def from_decoded_event(cls, decoded_event, timestamp: int) -> "Trade":
+        """Build a Trade from a decoded Trade log without re-validation
+
+        The ABI decoder already enforces the event types, so the only
+        work left is turning the checksummed address strings and the
+        HexBytes hash into raw bytes; model_construct then assigns the
+        fields without running the validator stack or re-hashing a
+        trade_data dict per log.
+        """
+        args = decoded_event['args']
+        return cls.model_construct(
+            trader=bytes.fromhex(args['trader'][2:]),
+            subject=bytes.fromhex(args['subject'][2:]),
+            is_buy=args['isBuy'],
+            share_amount=args['shareAmount'],
+            eth_amount=args['ethAmount'],
+            protocol_eth_amount=args['protocolEthAmount'],
+            subject_eth_amount=args['subjectEthAmount'],
+            supply=args['supply'],
+            transaction_hash=bytes(decoded_event['transactionHash']),
+            block_number=decoded_event['blockNumber'],
+            timestamp=timestamp,
+        )
+
+# The converters run per field per row, so each dispatches on the exact
+# type through a dict lookup instead of walking an isinstance chain.
+# asyncpg and the ABI decoder hand us concrete bytes/int already, which
+# makes the identity entry the common case. Subclasses (e.g. bool for
+# int) miss the dict and fall back to the isinstance-based slow path.
+
+def _bytes_from_str(value):
+    if value.startswith("0x"):
         return bytes.fromhex(value[2:])
-    elif isinstance(value, HexBytes):
+    raise ValueError(f'Expected a hex string, HexBytes, or bytes, got: {type(value).__name__}')
+
+def _int_from_str(value):
+    if value.isdigit():
+        return int(value)
+    elif value.startswith("0x"):
+        return int(value, 16)
+
+_BYTES_DISPATCH = {
+    bytes: lambda v: v,
+    HexBytes: bytes,
+    str: _bytes_from_str,
+}
+
+_INT_DISPATCH = {
+    int: lambda v: v,
+    str: _int_from_str,
+    float: int,
+    Decimal: int,
+}
+
+def convert_to_bytes(value):
+    handler = _BYTES_DISPATCH.get(type(value))
+    if handler is not None:
+        return handler(value)
+    if isinstance(value, HexBytes):
         return bytes(value)
     elif isinstance(value, bytes):
         return value
@@ -71,21 +150,12 @@ def convert_to_bytes(value):
         raise ValueError(f'Expected a hex string, HexBytes, or bytes, got: {type(value).__name__}')
 
 def convert_to_int(value):
+    handler = _INT_DISPATCH.get(type(value))
+    if handler is not None:
+        return handler(value)
     if isinstance(value, int):
         return value
-    elif isinstance(value, str):
-        if value.isdigit():
-            return int(value)
-        elif value.startswith("0x"):
-            return int(value, 16)
-    elif isinstance(value, float):
+    elif isinstance(value, (float, Decimal)):
         return int(value)
     else:
         raise ValueError(f'Expected a numerical value, got: {type(value).__name__}')
-
-def convert_to_decimal(value):
-    if isinstance(value, Decimal):
-        return value
-    elif isinstance(value, (str, float, int)):
-        return Decimal(value)
-    return value
\ No newline at end of file
@@ -1,7 +1,67 @@
-from typing import List, Union
+from operator import attrgetter
+from typing import List, Set, Union
 from db.models import Trade, Share
 from .client import Database
 
+# Field tuples, value getters and SQL strings are pure functions of the
+# model classes, so build them once at import time instead of on every call.
+_COPY_CHUNK_SIZE = 1000
+
+_TRADE_FIELDS = tuple(Trade.__fields__)
+_TRADE_FIELD_NAMES = ', '.join(_TRADE_FIELDS)
+_TRADE_VALUES = attrgetter(*_TRADE_FIELDS)
+
+_TRADE_INSERT_FROM_STAGE_SQL = f"""
+    INSERT INTO trades ({_TRADE_FIELD_NAMES})
+    SELECT {_TRADE_FIELD_NAMES} FROM trades_stage
+    ON CONFLICT (transaction_hash)
+    DO NOTHING;
+"""
+
+_SHARE_FIELDS = tuple(Share.__fields__)
+_SHARE_FIELD_NAMES = ', '.join(_SHARE_FIELDS)
+_SHARE_VALUES = attrgetter(*_SHARE_FIELDS)
+
+# PostgreSQL types of the shares columns, used to build the typed unnest()
+# arrays in update_shares (see db/init.sql).
+SHARE_COLUMN_TYPES = {
+    'address': 'bytea',
+    'twitter_username': 'text',
+    'twitter_name': 'text',
+    'twitter_score': 'float8',
+    'registered': 'int8',
+    'last_transaction': 'int8',
+    'balance': 'numeric',
+    'buy_price': 'numeric',
+    'sell_price': 'numeric',
+    'supply': 'int4',
+    'rank': 'int8',
+}
+
+_SHARE_UPDATE_FIELDS = tuple(field for field in _SHARE_FIELDS if field != 'address')
+_SHARE_UPDATE_COLUMNS = ('address',) + _SHARE_UPDATE_FIELDS
+_SHARE_UPDATE_SQL = f"""
+    UPDATE shares
+    SET {', '.join(f"{field} = COALESCE(src.{field}, shares.{field})" for field in _SHARE_UPDATE_FIELDS)}
+    FROM unnest({', '.join(f'${i + 1}::{SHARE_COLUMN_TYPES[column]}[]' for i, column in enumerate(_SHARE_UPDATE_COLUMNS))})
+        AS src({', '.join(_SHARE_UPDATE_COLUMNS)})
+    WHERE shares.address = src.address;
+"""
+
+_SHARE_INSERT_FROM_STAGE_SQL = f"""
+    INSERT INTO shares ({_SHARE_FIELD_NAMES})
+    SELECT {_SHARE_FIELD_NAMES} FROM shares_stage
+    ON CONFLICT (address)
+    DO NOTHING;
+"""
+
+_SHARES_MISSING_TWITTER_SQL = f"""
+    SELECT {_SHARE_FIELD_NAMES} FROM shares
+    WHERE twitter_username IS NULL
+    ORDER BY balance DESC
+    LIMIT $1;
+"""
+
 
 async def get_last_block(db: Database) -> Union[int, None]:
     """Retrieve the last block number from the trades table"""
@@ -16,80 +76,65 @@ async def get_last_block(db: Database) -> Union[int, None]:
 async def insert_trades(db: Database, trades_data: List[Trade]):
     """Insert multiple trades into the database"""
 
-    fields = [field for field in Trade.__fields__]
-    placeholders = ', '.join(f'${i+1}' for i in range(len(fields)))
-    field_names = ', '.join(fields)
-    
-    query = f"""
-        INSERT INTO trades ({field_names})
-        VALUES ({placeholders})
-        ON CONFLICT (transaction_hash)
-        DO NOTHING;
-    """
+    if not trades_data:
+        return
 
-    query = f"""
-        INSERT INTO trades ({field_names})
-        VALUES ({placeholders})
-    """
-    values = [tuple(getattr(trade, field) for field in fields) for trade in trades_data]
-    await db.execute_many(query, values)
+    # COPY streams all rows in one protocol message instead of one
+    # Bind/Execute per record through executemany. Staging through a temp
+    # table lets re-scanned blocks dedup on transaction_hash, which the
+    # old plain-INSERT form silently dropped.
+    records = list(map(_TRADE_VALUES, trades_data))
+    async with db.transaction() as conn:
+        await conn.execute("CREATE TEMP TABLE trades_stage (LIKE trades INCLUDING DEFAULTS) ON COMMIT DROP;")
+        # Chunked so one oversized batch does not buffer the whole range in
+        # a single COPY message.
+        for i in range(0, len(records), _COPY_CHUNK_SIZE):
+            await conn.copy_records_to_table('trades_stage', records=records[i:i + _COPY_CHUNK_SIZE], columns=_TRADE_FIELDS)
+        await conn.execute(_TRADE_INSERT_FROM_STAGE_SQL)
 
 
 async def get_all_shares(db: Database) -> List[Share]:
     """Retrieve all Share instances from the database."""
 
-    query = """
-        SELECT * FROM shares;
+    # Selecting the model fields explicitly locks the column order that
+    # Share.from_record indexes positionally.
+    query = f"""
+        SELECT {_SHARE_FIELD_NAMES} FROM shares;
     """
     rows = await db.fetch_all(query)
-    return [Share(**row) for row in rows]
+    return [Share.from_record(row) for row in rows]
 
 
-async def get_all_share_addresses(db: Database) -> List[bytes]:
-    """Retrieve all share addresses from the database."""
+async def get_all_share_addresses(db: Database) -> Set[bytes]:
+    """Retrieve the set of all share addresses from the database."""
 
     query = """
         SELECT address FROM shares;
     """
-    rows = await db.fetch_all(query)
-    return {row['address'] for row in rows}
+    return set(await db.fetch_column(query))
 
 async def get_shares_missing_twitter(db: Database, limit: int) -> List[Share]:
     """Retrieve the top shares without a twitter_username, ordered by balance."""
-    
-    query = """
-        SELECT * FROM shares 
-        WHERE twitter_username IS NULL
-        ORDER BY balance DESC 
-        LIMIT $1;
-    """
-    rows = await db.fetch_all(query, limit)
-    return [Share(**row) for row in rows]
+
+    # Prepared once per Database so the periodic twitter-update cycle
+    # re-executes the plan instead of re-parsing the query every time.
+    statement = await db.prepare_once('shares_missing_twitter', _SHARES_MISSING_TWITTER_SQL)
+    rows = await statement.fetch(limit)
+    return [Share.from_record(row) for row in rows]
+
 
 async def update_shares(db: Database, shares: List[Share]):
-    """Update multiple shares in the database"""
+    """Update multiple shares in the database with a single UNNEST statement"""
 
     if not shares:
         return
-    
-    update_queries = []
-    for share in shares:
-        fields_to_update = {field: value for field, value in share.model_dump().items() if value is not None and field != 'address'}
-        if not fields_to_update:
-            continue
-        
-        setters = ', '.join(f"{field} = ${i + 2}" for i, field in enumerate(fields_to_update))
-        query = f"""
-            UPDATE shares
-            SET {setters}
-            WHERE address = $1;
-        """
-        values = [share.address] + list(fields_to_update.values())
-        update_queries.append((query, values))
-
-    async with db.transaction() as transaction:
-        for query, values in update_queries:
-            await transaction.execute(query, *values)
+
+    # Ship all rows in one statement instead of one UPDATE per share.
+    # Fields that are None for a given share keep their current value
+    # through the COALESCE, matching the old per-row behaviour of only
+    # setting non-None fields.
+    values = [[getattr(share, column) for share in shares] for column in _SHARE_UPDATE_COLUMNS]
+    await db.execute_query(_SHARE_UPDATE_SQL, *values)
 
 
 async def insert_shares(db: Database, shares: List[Share]):
@@ -98,16 +143,11 @@ async def insert_shares(db: Database, shares: List[Share]):
     if not shares:
         return
 
-    fields = [field for field in Share.__fields__]
-    placeholders = ', '.join(f'${i+1}' for i in range(len(fields)))
-    field_names = ', '.join(fields)
-
-    query = f"""
-        INSERT INTO shares ({field_names})
-        VALUES ({placeholders})
-        ON CONFLICT (address)
-        DO NOTHING;
-    """
+    records = list(map(_SHARE_VALUES, shares))
 
-    values = [tuple(getattr(share, field) for field in fields) for share in shares]
-    await db.execute_many(query, values)
+    # COPY itself cannot express ON CONFLICT, so stage the rows into a
+    # temp table and upsert from there to keep the dedup semantics.
+    async with db.transaction() as conn:
+        await conn.execute("CREATE TEMP TABLE shares_stage (LIKE shares INCLUDING DEFAULTS) ON COMMIT DROP;")
+        await conn.copy_records_to_table('shares_stage', records=records, columns=_SHARE_FIELDS)
+        await conn.execute(_SHARE_INSERT_FROM_STAGE_SQL)
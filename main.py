@@ -12,12 +12,12 @@ httpx_logger.setLevel(logging.WARNING)
 logger = logging.getLogger(__name__)
 
 
-async def periodic_blockchain_scan(db: Database, scanner: Scanner, interval: int, semaphore: asyncio.Semaphore, batch_size: int):
+async def periodic_blockchain_scan(db: Database, scanner: Scanner, interval: int, batch_size: int):
     """Periodically scan the blockchain for new data."""
     while True:
         try:
             logger.info("Starting blockchain scan...")
-            await scan_blockchain(db, scanner, semaphore, batch_size)
+            await scan_blockchain(db, scanner, batch_size)
             logger.info("Blockchain scan completed")
         except Exception as e:
             logger.exception(f"An error occurred during blockchain scannings: {e}")
@@ -42,13 +42,12 @@ async def main():
         await db.connect()
 
         scanner = Scanner(BASE_RPC_LIST)
-        semaphore = asyncio.Semaphore(5)
         batch_size = 50
 
         # Start periodic tasks
         block_interval, twitter_interval = 5, 5
         blockchain_task = asyncio.create_task(
-            periodic_blockchain_scan(db, scanner, block_interval, semaphore, batch_size)
+            periodic_blockchain_scan(db, scanner, block_interval, batch_size)
         )
         twitter_task = asyncio.create_task(
             periodic_twitter_info_update(db, twitter_interval)
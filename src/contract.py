@@ -1,32 +1,154 @@
+import functools
+import logging
+from itertools import cycle
 from pathlib import Path
 from web3 import Web3, middleware
+from web3._utils.abi import get_abi_output_types
 from web3.gas_strategies.time_based import fast_gas_price_strategy
-from conf.base import BASE_MAINNET, CONTRACT_ADDRESS
+from conf.base import BASE_MAINNET, BASE_RPC_LIST, CONTRACT_ADDRESS
+
+logger = logging.getLogger(__name__)
+
+# Canonical Multicall3 deployment (same address on Base as on mainnet)
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"name": "target", "type": "address"},
+                    {"name": "allowFailure", "type": "bool"},
+                    {"name": "callData", "type": "bytes"},
+                ],
+                "name": "calls",
+                "type": "tuple[]",
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"name": "success", "type": "bool"},
+                    {"name": "returnData", "type": "bytes"},
+                ],
+                "name": "returnData",
+                "type": "tuple[]",
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function",
+    }
+]
+
+
+@functools.lru_cache(maxsize=1)
+def _load_abi() -> str:
+    """Read the friendtech ABI once and share it across Contract instances"""
+    return (Path(__file__).absolute().parent / "../abi/friendTechAbi.json").read_text()
+
+
+@functools.lru_cache(maxsize=4096)
+def _calc_price(supply: int, amount: int) -> int:
+    """Closed-form bonding-curve price in wei, mirroring the contract's getPrice"""
+    # Difference of square pyramidal sums. The formula already yields 0 for
+    # supply == 0 (and for the first share), so no special-case branches are
+    # needed, and staying in integer math matches the contract's arithmetic
+    # exactly. Cached since the scanner re-prices the same (supply, 1) pairs.
+    sum1 = (supply - 1) * supply * (2 * supply - 1) // 6
+    upper = supply - 1 + amount
+    sum2 = upper * (upper + 1) * (2 * upper + 1) // 6
+    return (sum2 - sum1) * 10**18 // 16000
 
 
 class Contract:
-    def __init__(self, contract_address=CONTRACT_ADDRESS, base_mainnet=BASE_MAINNET, private_key=None):
-        self.w3 = Web3(Web3.HTTPProvider(base_mainnet))
+    def __init__(self, contract_address=CONTRACT_ADDRESS, base_mainnet=BASE_MAINNET, private_key=None, rpc_list=None):
+        self.w3 = self._build_w3(base_mainnet)
         self.w3.eth.set_gas_price_strategy(fast_gas_price_strategy)
-        self.w3.middleware_onion.add(middleware.time_based_cache_middleware)
-        self.w3.middleware_onion.add(middleware.latest_block_based_cache_middleware)
-        self.w3.middleware_onion.add(middleware.simple_cache_middleware)
 
         self.private_key = private_key
         self.account = self.w3.eth.account.from_key(self.private_key) if self.private_key else None
-        script_location = Path(__file__).absolute().parent
-        abi_path = script_location / "../abi/friendTechAbi.json"
-        with open(abi_path, "r") as file:
-            self.abi = file.read()
+        self.abi = _load_abi()
 
         self.contract = self.w3.eth.contract(address=contract_address, abi=self.abi)
+        self.multicall3 = self.w3.eth.contract(address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI)
+        # Checksumming keccak-hashes the address, so cache it per address
+        self._checksum = functools.lru_cache(maxsize=8192)(self.w3.to_checksum_address)
+
+        # Round-robin read-only calls across every configured RPC endpoint so
+        # a single provider's rate limit doesn't bound the scan throughput.
+        # Transactions keep going through the primary provider.
+        read_rpcs = [url for url in (rpc_list if rpc_list is not None else BASE_RPC_LIST) if url]
+        read_contracts = [self.contract]
+        for url in read_rpcs:
+            if url == base_mainnet:
+                continue
+            w3 = self._build_w3(url)
+            read_contracts.append(w3.eth.contract(address=contract_address, abi=self.abi))
+        self._read_contracts = cycle(read_contracts)
+
+    @staticmethod
+    def _build_w3(url) -> Web3:
+        """Construct a Web3 instance with the shared cache middlewares"""
+        w3 = Web3(Web3.HTTPProvider(url))
+        w3.middleware_onion.add(middleware.time_based_cache_middleware)
+        w3.middleware_onion.add(middleware.latest_block_based_cache_middleware)
+        w3.middleware_onion.add(middleware.simple_cache_middleware)
+        return w3
+
+    def multicall(self, calls, allow_failure=True):
+        """Batch multiple read-only contract calls into a single RPC via Multicall3
+
+        calls is a list of (function_name, args) tuples against the friendtech
+        contract. Returns the decoded results in order, with None in place of
+        any call that reverted (when allow_failure is True).
+        """
+        try:
+            payload = []
+            function_names = []
+            for function_name, args in calls:
+                args = [
+                    self._get_valid_checksum_address(arg)
+                    if isinstance(arg, str) and self.w3.is_address(arg) else arg
+                    for arg in args
+                ]
+                call_data = self.contract.encodeABI(fn_name=function_name, args=args)
+                payload.append((self.contract.address, allow_failure, call_data))
+                function_names.append(function_name)
+
+            results = self.multicall3.functions.aggregate3(payload).call()
+
+            decoded = []
+            for function_name, (success, return_data) in zip(function_names, results):
+                if not success:
+                    decoded.append(None)
+                    continue
+                fn_abi = self.contract.get_function_by_name(function_name).abi
+                outputs = self.w3.codec.decode(get_abi_output_types(fn_abi), return_data)
+                decoded.append(outputs[0] if len(outputs) == 1 else outputs)
+            return decoded
+        except Exception as e:
+            logger.error("An error occurred while executing multicall: %s", e)
+            return None
 
     def _get_valid_checksum_address(self, address):
         """Validate and convert the provided address to a checksum address"""
         if not self.w3.is_address(address):
             raise ValueError(f"Invalid Ethereum address: {address}")
-        return self.w3.to_checksum_address(address)
-    
+        return self._checksum(address)
+
+    def _call_fast(self, function_name, *args):
+        """Read-only contract call for addresses that are already known-good
+
+        Skips the per-kwarg validation loop of _execute_contract_function;
+        used by the price/supply getters on the scanner hot path.
+        """
+        try:
+            contract_function = getattr(next(self._read_contracts).functions, function_name)
+            return contract_function(*args).call()
+        except Exception as e:
+            logger.error("An error occurred while executing %s: %s", function_name, e)
+            return None
+
     def _execute_contract_function(self, function_name, **kwargs):
         """Generic method to execute a specified contract function"""
         try:
@@ -37,7 +159,7 @@ class Contract:
             contract_function = getattr(self.contract.functions, function_name)
             return contract_function(**kwargs).call()
         except Exception as e:
-            print(f"An error occurred while executing {function_name}: {e}")
+            logger.error("An error occurred while executing %s: %s", function_name, e)
             return None  #TODO Consider appropriate error handling
     
     def _create_signed_transaction(self, method, value=None):
@@ -65,73 +187,69 @@ class Contract:
             signed_txn = self.w3.eth.account.sign_transaction(built_transaction, private_key=self.private_key)
             return signed_txn
         except Exception as e:
-            print(f"An error occurred while creating the transaction: {e}")
+            logger.error("An error occurred while creating the transaction: %s", e)
             return None
     
     def calc_price(self, supply, amount):
         """Calculate the price based on supply and amount"""
         try:
-            sum1 = 0 if supply == 0 else (supply - 1) * supply * (2 * (supply - 1) + 1) // 6
-            sum2 = 0 if supply == 0 and amount == 1 else (supply - 1 + amount) * (supply + amount) * (2 * (supply - 1 + amount) + 1) // 6
-            summation = sum2 - sum1
-            return summation * 10**18 // 16000
+            return _calc_price(supply, amount)
         except Exception as e:
-            print(f"An error occurred while calculating the price: {e}")
+            logger.error("An error occurred while calculating the price: %s", e)
             return None
-        
+
     def calc_buy_price_after_fee(self, supply, amount):
         """Calculate the buy price after including all applicable fees"""
         try:
             price = self.calc_price(supply=supply, amount=amount)
             if price is None:
                 raise ValueError("Error calculating the base price.")
-            
-            protocol_fee = price * 0.05
-            subject_fee = price * 0.05
-            return price + protocol_fee + subject_fee
-            
+
+            # 5% protocol fee + 5% subject fee, in integer wei like the contract
+            fee = price // 20
+            return price + 2 * fee
+
         except Exception as e:
-            print(f"An error occurred while calculating the buy price after fees: {e}")
+            logger.error("An error occurred while calculating the buy price after fees: %s", e)
             return None
-        
+
     def calc_sell_price_after_fee(self, supply, amount):
         """Calculate the sell price after including all applicable fees"""
         try:
             price = self.calc_price(supply=supply - amount, amount=amount)
             if price is None:
                 raise ValueError("Error calculating the base price.")
-            
-            protocol_fee = price * 0.05
-            subject_fee = price * 0.05
-            return price - protocol_fee - subject_fee
-            
+
+            fee = price // 20
+            return price - 2 * fee
+
         except Exception as e:
-            print(f"An error occurred while calculating the buy price after fees: {e}")
+            logger.error("An error occurred while calculating the buy price after fees: %s", e)
             return None
 
     def get_buy_price(self, address, amount):
         """Returns buy price of a share in wei"""
-        return self._execute_contract_function('getBuyPrice', address=address, amount=amount)
+        return self._call_fast('getBuyPrice', self._checksum(address), amount)
 
     def get_buy_price_after_fee(self, address, amount):
         """Returns buy price of a share after fees in wei"""
-        return self._execute_contract_function('getBuyPriceAfterFee', address=address, amount=amount)
-            
+        return self._call_fast('getBuyPriceAfterFee', self._checksum(address), amount)
+
     def get_sell_price(self, address, amount):
         """Returns sell price of a share in wei"""
-        return self._execute_contract_function('getSellPrice', address=address, amount=amount)
+        return self._call_fast('getSellPrice', self._checksum(address), amount)
 
     def get_sell_price_after_fee(self, address, amount):
         """Returns sell price of a share after fees in wei"""
-        return self._execute_contract_function('getSellPriceAfterFee', address=address, amount=amount)
+        return self._call_fast('getSellPriceAfterFee', self._checksum(address), amount)
 
     def get_shares_supply(self, address):
         """Returns supply of share"""
-        return self._execute_contract_function('sharesSupply', address=address)
+        return self._call_fast('sharesSupply', self._checksum(address))
 
     def get_shares_owned(self, address, subject_address):
         """Returns how many shares of address the subject_address owns"""
-        return self._execute_contract_function('sharesBalance', address=address, subject_address=subject_address)
+        return self._call_fast('sharesBalance', self._checksum(address), self._checksum(subject_address))
     
     def buy_shares(self, address, amount=1):
         """Buys shares of a given address"""
@@ -145,28 +263,28 @@ class Contract:
             # Attempt to calculate the cost with the fee included locally
             price = self.calc_buy_price_after_fee(address, amount)
             if price is None:
-                print("Local price calculation failed, retrieving price from the contract.")
+                logger.warning("Local price calculation failed, retrieving price from the contract.")
                 price = self.get_buy_price_after_fee(address, amount)
                 if price is None:
-                    print("Could not retrieve the buy price after fee from the contract.")
+                    logger.warning("Could not retrieve the buy price after fee from the contract.")
                     return
             if price == 0:
-                print("Only the shares' subject can buy the first share.")
+                logger.warning("Only the shares' subject can buy the first share.")
                 return
             
             # Check if funds are sufficient
             if self.w3.eth.get_balance(self.account.address) < price:
-                print("Insufficient funds for this transaction.")
+                logger.warning("Insufficient funds for this transaction.")
                 return
 
             contract_function = self.contract.functions.buyShares(address, amount)
             signed_txn = self._create_signed_transaction(contract_function, value=price)
             tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
             basescan_link = f"https://basescan.org/tx/{tx_hash.hex()}"
-            print("Transaction sent:\n" + basescan_link)
+            logger.info("Transaction sent: %s", basescan_link)
             return basescan_link
         except Exception as e:
-            print(f"An error occurred while buying shares: {e}")
+            logger.error("An error occurred while buying shares: %s", e)
     
     def sell_shares(self, address, amount=1):
         """Sells shares of a given address"""
@@ -180,23 +298,23 @@ class Contract:
             # Check the number of shares the user owns
             owned_shares = self.get_shares_owned(address, self.account.address)
             if owned_shares is None:
-                print("Could not retrieve the number of shares owned.")
+                logger.warning("Could not retrieve the number of shares owned.")
                 return
             if owned_shares < amount:
-                print(f"You own {owned_shares} shares but tried to sell {amount}.")
+                logger.warning("You own %s shares but tried to sell %s.", owned_shares, amount)
                 return
             
             # Check the total supply of shares to ensure we're not selling the last share
             shares_supply = self.get_shares_supply(address)
             if shares_supply <= amount:
-                print("Cannot sell the last share.")
+                logger.warning("Cannot sell the last share.")
                 return
         
             contract_function = self.contract.functions.sellShares(address, amount)
             signed_txn = self._create_signed_transaction(contract_function)
             tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
             basescan_link = f"https://basescan.org/tx/{tx_hash.hex()}"
-            print("Transaction sent:\n" + basescan_link)
+            logger.info("Transaction sent: %s", basescan_link)
             return basescan_link
         except Exception as e:
-            print(f"An error occurred while selling shares: {e}")
\ No newline at end of file
+            logger.error("An error occurred while selling shares: %s", e)
\ No newline at end of file
@@ -13,27 +13,45 @@ class FriendTech:
         if jwt:
             self.headers['Authorization'] = f'Bearer {jwt}'
 
+        # One client for the lifetime of the instance: connections to the
+        # backend are kept alive and reused across requests instead of
+        # paying a DNS + TCP + TLS handshake per call.
+        self._client = httpx.AsyncClient(
+            base_url=self.backend_url,
+            headers=self.headers,
+            timeout=15.0,
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+        )
+
+    async def aclose(self):
+        """Close the underlying HTTP client and its pooled connections"""
+        await self._client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
     async def _make_request(self, method: str, endpoint: str, need_auth: bool = False, **kwargs):
         """Network request with error handling."""
         if need_auth and 'Authorization' not in self.headers:
             logger.error("Attempt to make authorized request without JWT")
             raise ValueError("JWT is required for this request.")
-        
-        url = f'{self.backend_url}/{endpoint}'
 
         try:
-            async with httpx.AsyncClient(timeout=15.0) as client:
-                response = await client.request(method, url, headers=self.headers, **kwargs)
-                response.raise_for_status()
-                return response.json()
+            response = await self._client.request(method, endpoint, **kwargs)
+            response.raise_for_status()
+            return response.json()
 
         except httpx.HTTPError as e:
             # Log the error with exception information
             logger.error(f"HTTP error occurred during {method} request to {endpoint}: {e}")
-            if response.status_code in (401, 403):
+            if isinstance(e, httpx.HTTPStatusError) and e.response.status_code in (401, 403):
                 logger.warning("Unauthorized request. Check your JWT.")
             return None
-        
+
     async def get_recently_joined_users(self):
         """Returns Response object with list of recently joined users"""
         return await self._make_request("GET", 'lists/recently-joined', need_auth=True)
@@ -45,7 +63,7 @@ class FriendTech:
     async def get_address_from_twitter_username(self, username):
         """Returns base address of the user"""
         return await self._make_request("GET", f'search/users?username={username}', need_auth=True)
-    
+
     async def get_info_from_address(self, address):
         """Returns user info from address"""
         return await self._make_request("GET", f'users/{address}')
@@ -57,7 +75,7 @@ class FriendTech:
     async def get_holders(self, address):
         """Returns token holder of an address"""
         return await self._make_request("GET", f'users/{address}/token/holders')
-    
+
     async def get_holdings(self, address):
         """Returns token holdings of an address"""
-        return await self._make_request("GET", f'users/{address}/token-holdings')
\ No newline at end of file
+        return await self._make_request("GET", f'users/{address}/token-holdings')
@@ -1,64 +1,222 @@
-import json
+import random
 import asyncio
+import aiohttp
 import backoff
+import httpx
+import orjson
 import logging
+from pathlib import Path
 from time import time
-from collections import defaultdict
+from functools import lru_cache
+from collections import defaultdict, deque
+from typing import Union
 from pydantic import ValidationError
 from web3 import AsyncWeb3
+from web3.exceptions import Web3Exception
 from web3.middleware import async_geth_poa_middleware
-from eth_utils import to_hex
+from hexbytes import HexBytes
 from db.models import Trade
 from conf.base import CONTRACT_ADDRESS, EVENT_SIGNUTARE
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Parsed once at import and shared by every Scanner instance; also anchored
+# to this file instead of the process working directory.
+_ABI_PATH = Path(__file__).absolute().parent.parent / "abi" / "friendTechAbi.json"
+_CONTRACT_ABI = orjson.loads(_ABI_PATH.read_bytes())
+
+class _OrjsonHTTPProvider(AsyncWeb3.AsyncHTTPProvider):
+    """AsyncHTTPProvider that (de)serializes JSON-RPC with orjson
+
+    RPC responses are the largest payloads this process parses; orjson
+    decodes them straight from bytes, several times faster than the
+    stdlib json the base provider uses. Request encoding falls back to
+    the base encoder for the rare parameter orjson cannot serialize.
+    """
+
+    def encode_rpc_request(self, method, params) -> bytes:
+        rpc_dict = {
+            "jsonrpc": "2.0",
+            "method": method,
+            "params": params or [],
+            "id": next(self.request_counter),
+        }
+        try:
+            return orjson.dumps(rpc_dict)
+        except TypeError:
+            return super().encode_rpc_request(method, params)
+
+    def decode_rpc_response(self, raw_response: bytes):
+        return orjson.loads(raw_response)
+
+
+@lru_cache(maxsize=100_000)
+def _checksum(address: Union[str, bytes]) -> str:
+    """EIP-55 checksum an address, cached so the keccak is paid once
+
+    The balance paths re-checksum the same subject addresses on every
+    share refresh; the active address set is small enough to keep the
+    results resident.
+    """
+    return AsyncWeb3.to_checksum_address(address)
+
+
+# Endpoint-scoring knobs: failures pull an endpoint's score down hard,
+# every pick drifts it back toward 1.0, and the floor keeps even a dead
+# endpoint occasionally probed so it can recover.
+_SCORE_FAILURE_ALPHA = 0.3
+_SCORE_RECOVERY_ALPHA = 0.05
+_SCORE_FLOOR = 0.05
+_BACKOFF_WINDOW = 600
+
+# Shared retry policy for the per-block RPC helpers: truncated binary
+# exponential backoff with full jitter, capped at 30s between attempts.
+# Only transport, provider and timeout failures are retried (provider
+# errors from the raw-RPC helpers surface as ValueError); validation
+# errors give up immediately instead of re-fetching the same bad data.
+_retry_rpc = backoff.on_exception(
+    backoff.expo,
+    (httpx.HTTPError, aiohttp.ClientError, Web3Exception, asyncio.TimeoutError, TimeoutError, ValueError),
+    base=2,
+    factor=0.25,
+    max_value=30,
+    max_tries=32,
+    jitter=backoff.full_jitter,
+    giveup=lambda e: isinstance(e, ValidationError),
+)
+
+# Canonical Multicall3 deployment (same address on Base as on mainnet)
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"name": "target", "type": "address"},
+                    {"name": "allowFailure", "type": "bool"},
+                    {"name": "callData", "type": "bytes"},
+                ],
+                "name": "calls",
+                "type": "tuple[]",
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"name": "success", "type": "bool"},
+                    {"name": "returnData", "type": "bytes"},
+                ],
+                "name": "returnData",
+                "type": "tuple[]",
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function",
+    },
+    {
+        "inputs": [{"name": "addr", "type": "address"}],
+        "name": "getEthBalance",
+        "outputs": [{"name": "balance", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function",
+    },
+]
+
 class Scanner:
-    def __init__(self, rpcs:list[str], contract_address: str = CONTRACT_ADDRESS, event_signature_hash: str = EVENT_SIGNUTARE, sem: int = 5) -> None:
+    def __init__(self, rpcs:list[str], contract_address: str = CONTRACT_ADDRESS, event_signature_hash: str = EVENT_SIGNUTARE, sem: int = 5, rpc_batch_size: int = 32, block_concurrency: int = 5) -> None:
         self.contract_address = contract_address
+        # Lowercased once here; the scan loops compare it against every
+        # transaction/receipt 'to' field.
+        self._contract_address_lower = contract_address.lower()
         self.event_signature_hash = event_signature_hash
         self.contract = None
-        self.semaphore = asyncio.Semaphore(sem) 
+        self.semaphore = asyncio.Semaphore(sem)
+        # Single limiter for concurrent block-range fetches, owned by the
+        # scanner so every caller shares one bound on in-flight RPC load
+        # instead of each creating its own.
+        self.block_fetch_sem = asyncio.Semaphore(block_concurrency)
         self.rpcs = rpcs
-        self.backoff_times = defaultdict(list)
+        self.backoff_times = defaultdict(deque)
         self.requests_counter = {}
         self.last_selected = {rpc: 0 for rpc in rpcs}
-        with open("abi/friendTechAbi.json", 'r') as file:
-            self.contract_abi = json.load(file)
+        self._rpc_score = {rpc: 1.0 for rpc in rpcs}
+        self.contract_abi = _CONTRACT_ABI
+        # One AsyncWeb3 per endpoint for the lifetime of the scanner, so the
+        # underlying HTTP sessions are kept alive and reused instead of a
+        # fresh client (and TCP + TLS handshake) per RPC call.
+        self._w3_by_rpc = {rpc: self._build_w3(rpc) for rpc in rpcs}
+        # Contract construction re-validates the whole ABI, so build the
+        # contract and its bound Trade event once per endpoint instead of
+        # per decoded transaction. The raw topic bytes are hoisted too so
+        # log matching compares bytes directly instead of hex-encoding
+        # every topic.
+        self._trade_events_by_rpc = {
+            rpc: web3.eth.contract(address=self.contract_address, abi=self.contract_abi).events.Trade()
+            for rpc, web3 in self._w3_by_rpc.items()
+        }
+        # Log decoding itself is endpoint-independent; keep one bound event
+        # for the local (no-RPC) decode path.
+        self._trade_event = next(iter(self._trade_events_by_rpc.values()))
+        self._event_sig_bytes = bytes.fromhex(event_signature_hash[2:])
+        self._multicall_by_rpc = {
+            rpc: web3.eth.contract(address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI)
+            for rpc, web3 in self._w3_by_rpc.items()
+        }
+        # JSON-RPC 2.0 batch requests aren't exposed by web3's provider, so
+        # batched scans post them directly over a shared httpx client.
+        # Kept modest by default since providers differ in how large a
+        # batch they accept.
+        self.rpc_batch_size = rpc_batch_size
+        self._http = httpx.AsyncClient(timeout=30.0, limits=httpx.Limits(max_keepalive_connections=len(rpcs) * 2))
 
-    async def _get_w3(self) -> tuple[AsyncWeb3, str]:
+    @staticmethod
+    def _build_w3(rpc: str) -> AsyncWeb3:
+        web3 = AsyncWeb3(_OrjsonHTTPProvider(rpc, request_kwargs={"timeout": 30}))
+        web3.middleware_onion.inject(async_geth_poa_middleware, layer=0)
+        return web3
+
+    async def close(self) -> None:
+        """Disconnect the cached provider sessions"""
+        await self._http.aclose()
+        for web3 in self._w3_by_rpc.values():
+            disconnect = getattr(web3.provider, 'disconnect', None)
+            if disconnect is not None:
+                await disconnect()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def _note_failure(self, rpc: str) -> None:
+        """Record a failed call so _get_w3 deprioritizes the endpoint"""
         current_time = time()
+        timestamps = self.backoff_times[rpc]
+        timestamps.append(current_time)
+        # Time-bounded deque prune instead of rescanning the whole history
+        while timestamps and timestamps[0] < current_time - _BACKOFF_WINDOW:
+            timestamps.popleft()
+        self._rpc_score[rpc] = max(self._rpc_score[rpc] * (1.0 - _SCORE_FAILURE_ALPHA), _SCORE_FLOOR)
 
-        def recent_backoffs(rpc):
-            return sum(1 for timestamp in self.backoff_times[rpc] if current_time - timestamp < 600)
-    
-        # Calculate the backoff ratio for each rpc
-        def backoff_ratio(rpc):
-            return recent_backoffs(rpc) / (self.requests_counter.get(rpc, 0) + 0.000001)
-
-        sorted_rpcs = sorted(
-            self.rpcs,
-            key=lambda rpc: (
-                self.last_selected[rpc] - current_time, 
-                backoff_ratio(rpc), 
-                self.requests_counter.get(rpc, 0)
-            )
-        )
-
-        # Pick the first RPC from the sorted list
-        rpc = sorted_rpcs[0]
+    async def _get_w3(self) -> tuple[AsyncWeb3, str]:
+        # Weighted random pick over the decayed per-endpoint scores. O(N)
+        # per acquisition instead of a full sort whose key function
+        # rescanned each endpoint's backoff history, and the randomness
+        # spreads load across healthy endpoints instead of pinning the
+        # current best one.
+        rpc = random.choices(self.rpcs, weights=[self._rpc_score[r] for r in self.rpcs], k=1)[0]
         self.requests_counter[rpc] = self.requests_counter.get(rpc, 0) + 1
+        self.last_selected[rpc] = time()
+        score = self._rpc_score[rpc]
+        self._rpc_score[rpc] = score + (1.0 - score) * _SCORE_RECOVERY_ALPHA
 
-        # Update the last selected time
-        self.last_selected[rpc] = current_time
-
-        web3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(rpc))
-        web3.middleware_onion.inject(async_geth_poa_middleware, layer=0)
-        return web3, rpc
+        return self._w3_by_rpc[rpc], rpc
 
     
-    @backoff.on_exception(backoff.constant, Exception, interval=1, max_tries=1000000)
+    @_retry_rpc
     async def _filter_transactions(self, block_number: int):
         web3, rpc = await self._get_w3()
         try:
@@ -66,66 +224,220 @@ class Scanner:
             timestamp = block['timestamp']
             relevant_transactions = []
             for tx in block['transactions']:
-                if tx['to'] and tx['to'].lower() == self.contract_address.lower():
+                if tx['to'] and tx['to'].lower() == self._contract_address_lower:
                     relevant_transactions.append(tx)
             return relevant_transactions, timestamp
         except Exception as e:
             logger.error(f"Failed to filter transactions for block {block_number}: {e}")
-            self.backoff_times[rpc].append(time())
+            self._note_failure(rpc)
             raise e
 
-    @backoff.on_exception(backoff.constant, Exception, interval=1, max_tries=1000000)
+    @_retry_rpc
     async def _decode_trade_events(self, transaction, timestamp):
         web3, rpc = await self._get_w3()
         try:
             trades = []
             tx_receipt = await web3.eth.get_transaction_receipt(transaction['hash'])
-            contract = web3.eth.contract(address=self.contract_address, abi=self.contract_abi)
+            trade_event = self._trade_events_by_rpc[rpc]
             if tx_receipt.status == 1:
                 for log in tx_receipt['logs']:
-                    if to_hex(log['topics'][0]) == self.event_signature_hash:
-                        decoded_event = contract.events.Trade().process_log(log)
-                        trade_data = {
-                            'trader': decoded_event['args']['trader'],
-                            'subject': decoded_event['args']['subject'],
-                            'is_buy': decoded_event['args']['isBuy'],
-                            'share_amount': decoded_event['args']['shareAmount'],
-                            'eth_amount': decoded_event['args']['ethAmount'],
-                            'protocol_eth_amount': decoded_event['args']['protocolEthAmount'],
-                            'subject_eth_amount': decoded_event['args']['subjectEthAmount'],
-                            'supply': decoded_event['args']['supply'],
-                            'transaction_hash': decoded_event['transactionHash'],
-                            'block_number': decoded_event['blockNumber'],
-                            'timestamp': timestamp
-                        }
-                        try:
-                            # Validate and create a trade model instance
-                            trade = Trade.model_validate(trade_data)
-                            trades.append(trade)
-                        except ValidationError as e:
-                            logger.error(f"Data validation error for trade: {e.json()}")
-                            raise e
+                    if log['topics'][0] == self._event_sig_bytes:
+                        trades.append(Trade.from_decoded_event(trade_event.process_log(log), timestamp))
             return trades
         except Exception as e:
             logger.error(f"Failed to decode trade events for transaction {transaction['hash']}: {e}")
-            self.backoff_times[rpc].append(time())
+            self._note_failure(rpc)
+            raise e
+
+    @_retry_rpc
+    async def _get_block_receipts(self, block_number: int):
+        """Fetch every receipt of a block in one eth_getBlockReceipts call
+
+        Returns None when the provider does not expose the method, so the
+        caller can fall back to per-transaction receipt lookups.
+        """
+        web3, rpc = await self._get_w3()
+        try:
+            response = await web3.provider.make_request("eth_getBlockReceipts", [hex(block_number)])
+            if 'error' in response:
+                if response['error'].get('code') == -32601:
+                    return None
+                raise ValueError(response['error'])
+            return response['result']
+        except Exception as e:
+            logger.error(f"Failed to get receipts for block {block_number}: {e}")
+            self._note_failure(rpc)
             raise e
 
+    @_retry_rpc
+    async def _get_block_timestamp(self, block_number: int):
+        """Fetch a block header (no transaction bodies) for its timestamp"""
+        web3, rpc = await self._get_w3()
+        try:
+            block = await web3.eth.get_block(block_number)
+            return block['timestamp']
+        except Exception as e:
+            logger.error(f"Failed to get timestamp for block {block_number}: {e}")
+            self._note_failure(rpc)
+            raise e
+
+    @staticmethod
+    def _format_receipt_log(log: dict) -> dict:
+        """Normalize a raw eth_getBlockReceipts log entry for process_log"""
+        return {
+            'address': log['address'],
+            'topics': [HexBytes(topic) for topic in log['topics']],
+            'data': HexBytes(log['data']),
+            'blockNumber': int(log['blockNumber'], 16),
+            'transactionHash': HexBytes(log['transactionHash']),
+            'transactionIndex': int(log['transactionIndex'], 16),
+            'blockHash': HexBytes(log['blockHash']),
+            'logIndex': int(log['logIndex'], 16),
+        }
+
+    def _decode_log(self, log, timestamp: int) -> Trade:
+        """Decode a single Trade log locally, without any RPC"""
+        return Trade.from_decoded_event(self._trade_event.process_log(log), timestamp)
+
+    def _decode_receipt_logs(self, receipt: dict, timestamp: int) -> list[Trade]:
+        """Decode the Trade events of a raw receipt locally, without any RPC"""
+        return [
+            self._decode_log(self._format_receipt_log(log), timestamp)
+            for log in receipt['logs']
+            if log['topics'][0] == self.event_signature_hash
+        ]
+
+    async def _batch_rpc(self, calls: list[tuple[str, list]]):
+        """POST a JSON-RPC 2.0 batch, returning the results in call order
+
+        Packs many RPC calls into a single HTTP POST instead of one POST
+        per call. Raises if the provider rejects the batch or any call in
+        it errors.
+        """
+        web3, rpc = await self._get_w3()
+        payload = [
+            {'jsonrpc': '2.0', 'id': i, 'method': method, 'params': params}
+            for i, (method, params) in enumerate(calls)
+        ]
+        try:
+            response = await self._http.post(rpc, content=orjson.dumps(payload), headers={"Content-Type": "application/json"})
+            response.raise_for_status()
+            body = orjson.loads(response.content)
+            if isinstance(body, dict):
+                # A dict instead of a list means the provider rejected the
+                # batch as a whole
+                raise ValueError(body.get('error', body))
+
+            results_by_id = {item['id']: item for item in body}
+            results = []
+            for i in range(len(calls)):
+                item = results_by_id[i]
+                if 'error' in item:
+                    raise ValueError(item['error'])
+                results.append(item['result'])
+            return results
+        except Exception as e:
+            logger.error(f"Batch RPC of {len(calls)} calls to {rpc} failed: {e}")
+            self._note_failure(rpc)
+            raise e
+
+    @_retry_rpc
+    async def get_logs(self, from_block: int, to_block: int):
+        """Fetch the contract's Trade logs for a block range in one call
+
+        The node filters on contract address and event topic server-side,
+        so only the matching logs cross the wire instead of every
+        transaction (or receipt) of every block.
+        """
+        web3, rpc = await self._get_w3()
+        try:
+            return await web3.eth.get_logs({
+                'address': _checksum(self.contract_address),
+                'topics': [self.event_signature_hash],
+                'fromBlock': from_block,
+                'toBlock': to_block,
+            })
+        except Exception as e:
+            logger.error(f"Failed to get logs for blocks {from_block}-{to_block}: {e}")
+            self._note_failure(rpc)
+            raise e
+
+    async def get_trades_range(self, start: int, end: int) -> list[Trade]:
+        """Scan blocks [start, end) for trades via an eth_getLogs filter
+
+        One filtered log query covers the whole range, block headers are
+        then fetched (batched, headers only) for just the blocks that
+        contain trades, and decoding happens locally. Falls back to the
+        per-block receipt scan when the log query or header batch fails.
+        """
+        try:
+            logs = await self.get_logs(start, end - 1)
+            if not logs:
+                return []
+
+            block_numbers = sorted({log['blockNumber'] for log in logs})
+            timestamps = {}
+            for i in range(0, len(block_numbers), self.rpc_batch_size):
+                chunk = block_numbers[i:i + self.rpc_batch_size]
+                headers = await self._batch_rpc([("eth_getBlockByNumber", [hex(n), False]) for n in chunk])
+                for block_number, header in zip(chunk, headers):
+                    timestamps[block_number] = int(header['timestamp'], 16)
+
+            return [self._decode_log(log, timestamps[log['blockNumber']]) for log in logs]
+        except Exception as e:
+            logger.warning(f"Falling back to per-block scan for blocks {start}-{end - 1}: {e}")
+            trades = []
+            trades_extend = trades.extend
+
+            # The fallback fires when a provider is already struggling, so
+            # the per-block scans share the scanner's semaphore instead of
+            # fanning out the whole range at once.
+            async def bounded_get_trades(block_number: int):
+                async with self.semaphore:
+                    return await self.get_trades(block_number)
+
+            # as_completed consumes each block as it finishes instead of
+            # holding every result until the slowest one resolves.
+            for coro in asyncio.as_completed([bounded_get_trades(n) for n in range(start, end)]):
+                try:
+                    trades_extend(await coro)
+                except Exception as scan_error:
+                    logger.error(f"Error occurred during block scan: {scan_error}")
+            return trades
+
     async def get_trades(self, block_number: int):
         """Scan a block for transactions, returning the decoded trades"""
+        receipts = await self._get_block_receipts(block_number)
+        if receipts is None:
+            # Provider without eth_getBlockReceipts: per-transaction path
+            return await self._get_trades_from_transactions(block_number)
+
+        timestamp = await self._get_block_timestamp(block_number)
+        contract_address_lower = self._contract_address_lower
+        trades = []
+        trades_extend = trades.extend
+        for receipt in receipts:
+            if receipt.get('to') and receipt['to'].lower() == contract_address_lower and receipt.get('status') == '0x1':
+                trades_extend(self._decode_receipt_logs(receipt, timestamp))
+        return trades
+
+    async def _get_trades_from_transactions(self, block_number: int):
+        """Fallback scan issuing one eth_getTransactionReceipt per transaction"""
         trades = []
         relevant_transactions, timestamp = await self._filter_transactions(block_number)
-        async with self.semaphore:
-            decode_tasks = [self._decode_trade_events(tx, timestamp) for tx in relevant_transactions]
-            results = await asyncio.gather(*decode_tasks, return_exceptions=True)
-            for res in results:
-                if isinstance(res, Exception):
-                    logger.error(f"Error occurred during trade decoding: {res}")
-                else:
-                    trades.extend(res)
+        # Concurrency is gated per block by the caller holding
+        # self.semaphore; acquiring it again here would deadlock once the
+        # permits are exhausted.
+        decode_tasks = [self._decode_trade_events(tx, timestamp) for tx in relevant_transactions]
+        for coro in asyncio.as_completed(decode_tasks):
+            try:
+                trades.extend(await coro)
+            except Exception as e:
+                logger.error(f"Error occurred during trade decoding: {e}")
 
         return trades
-    
+
+
     async def get_last_block_number(self):
         """Get last block number"""
         web3, rpc = await self._get_w3()
@@ -134,17 +446,41 @@ class Scanner:
             return last_block
         except Exception as e:
             logger.error(f"Failed to get last block number: {e}")
-            self.backoff_times[rpc].append(time())
+            self._note_failure(rpc)
+            raise e
+
+    async def get_balances(self, addresses: list[str], chunk_size: int = 500):
+        """Get current balances for many wallets via Multicall3
+
+        Batches up to chunk_size getEthBalance calls into a single
+        aggregate3 round-trip per chunk instead of one eth_getBalance
+        RPC per address. Returns the balances in input order.
+        """
+        web3, rpc = await self._get_w3()
+        multicall = self._multicall_by_rpc[rpc]
+        try:
+            balances = []
+            for i in range(0, len(addresses), chunk_size):
+                calls = [
+                    (MULTICALL3_ADDRESS, False, multicall.encodeABI(fn_name='getEthBalance', args=[_checksum(address)]))
+                    for address in addresses[i:i + chunk_size]
+                ]
+                results = await multicall.functions.aggregate3(calls).call()
+                balances.extend(int.from_bytes(return_data, 'big') for _, return_data in results)
+            return balances
+        except Exception as e:
+            logger.error(f"Failed to get balances for {len(addresses)} addresses: {e}")
+            self._note_failure(rpc)
             raise e
 
-    async def get_balance(self, address: str):
+    async def get_balance(self, address: Union[str, bytes]):
         """Get wallet current balance"""
         web3, rpc = await self._get_w3()
         try:
-            checksum_address = web3.to_checksum_address(address)
+            checksum_address = _checksum(address)
             balance = await web3.eth.get_balance(checksum_address)
             return balance
         except Exception as e:
             logger.error(f"Failed to get {address} balance: {e}")
-            self.backoff_times[rpc].append(time())
+            self._note_failure(rpc)
             raise e
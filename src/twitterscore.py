@@ -13,21 +13,42 @@ class TwitterScore:
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        # One client for the lifetime of the instance so the twitter-update
+        # loop reuses connections to twitterscore.io instead of doing a
+        # TCP + TLS handshake per lookup.
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=self.headers,
+            timeout=10.0,
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=10, keepalive_expiry=30),
+        )
+
+    async def aclose(self):
+        """Close the underlying HTTP client and its pooled connections"""
+        await self._client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
 
     async def _make_request(self, endpoint: str, params: dict) -> Union[dict, None]:
         """Helper method to make requests to the TwitterScore API"""
-        url = f"{self.base_url}/{endpoint}"
         params['api_key'] = self.api_key
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, headers=self.headers, params=params)
-                response.raise_for_status()
-                return response.json()
+            response = await self._client.get(endpoint, params=params)
+            response.raise_for_status()
+            return response.json()
 
-        except httpx.HTTPError as e:
+        except httpx.HTTPStatusError as e:
             logger.error(f"HTTP error occurred: {e}; status code: {e.response.status_code}")
             return None
+        except httpx.HTTPError as e:
+            logger.error(f"HTTP error occurred: {e}")
+            return None
         except Exception as e:
             logger.error(f"An unexpected error occurred: {e}")
             return None
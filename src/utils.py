@@ -1,8 +1,8 @@
-import binascii
 import logging
-from itertools import chain
 import random
 import asyncio
+import functools
+from operator import attrgetter
 from typing import List
 
 from db.client import Database
@@ -16,7 +16,23 @@ from src.contract import Contract
 logger = logging.getLogger(__name__)
 
 
-async def scan_blockchain(db: Database, scanner: Scanner, semaphore: asyncio.Semaphore, batch_size: int):
+def _hex_addr(address: bytes) -> str:
+    """Render raw address bytes as a 0x-prefixed hex string"""
+    return "0x" + address.hex()
+
+
+@functools.lru_cache(maxsize=1)
+def _shared_contract() -> Contract:
+    """Lazily build the one Contract instance the share pipeline needs
+
+    Constructing Contract builds a Web3 (and re-parses the ABI) per
+    configured RPC endpoint — far too heavy to repeat per block range
+    inside the event loop just for the pure-integer price helpers.
+    """
+    return Contract()
+
+
+async def scan_blockchain(db: Database, scanner: Scanner, batch_size: int):
     """Scan the blockchain for new data."""
     start_block = await get_last_block(db)
     last_block = await scanner.get_last_block_number()
@@ -25,9 +41,11 @@ async def scan_blockchain(db: Database, scanner: Scanner, semaphore: asyncio.Sem
     if start_block >= last_block:
         logger.info("No new blocks to process. Exiting.")
         return
-    
+
+    # The scanner owns the limiter, so concurrent scan cycles share one
+    # bound on in-flight block fetches.
     async def bounded_handle_block_range(*args, **kwargs):
-        async with semaphore:
+        async with scanner.block_fetch_sem:
             return await handle_block_range(*args, **kwargs)
             
     batch_tasks = []
@@ -45,22 +63,13 @@ async def handle_block_range(scanner: Scanner, db: Database, start: int, end: in
     """Fetch trades for a range of blocks and insert them into the database"""
 
     logger.info(f"Handling block range from {start} to {end}")
-    block_tasks = []
-    concurrent_tasks = asyncio.Semaphore(5)
-
-    async def fetch_and_handle_trades(block_num):
-        async with concurrent_tasks:
-            return await scanner.get_trades(block_num)
-    
-    block_tasks = [fetch_and_handle_trades(block_num) for block_num in range(start, end)]
-
-    trades = await asyncio.gather(*block_tasks, return_exceptions=True)
-
-    valid_trades = []
-    for trade in trades:
-        if trade and not isinstance(trade, Exception):
-            valid_trades.append(trade)
-    flat_trades = list(chain.from_iterable(valid_trades))
+    # The scanner packs the whole range into a few batched JSON-RPC
+    # requests instead of an HTTP POST per block.
+    try:
+        flat_trades = await scanner.get_trades_range(start, end)
+    except Exception as e:
+        logger.error(f"Failed to scan blocks {start} to {end}: {e}")
+        return
 
     # Insert trades and shares into the database.
     if flat_trades:
@@ -78,27 +87,40 @@ async def handle_block_range(scanner: Scanner, db: Database, start: int, end: in
 async def process_trades_to_shares(db: Database, scanner: Scanner, trades: List[Trade]) -> None:
     """Fetch shares for a range of trades and insert them into the database"""
 
+    # Split into an RPC-bound compute phase and a DB-bound persist phase so
+    # the trade insert running concurrently in handle_block_range only
+    # overlaps with the enrichment, not with the share writes.
+    shares_to_update, shares_to_create = await compute_share_payloads(db, scanner, trades)
+    await persist_shares(db, shares_to_update, shares_to_create)
+
+
+async def compute_share_payloads(db: Database, scanner: Scanner, trades: List[Trade]) -> tuple:
+    """Build the share rows for a batch of trades, enriched with balances"""
+
     logger.info(f"Processing {len(trades)} trades to convert to shares.")
-    # Retrive Unique and most resent trades for each address
+    # Retrieve the unique most recent trade for each address: over a
+    # timestamp-sorted pass the last write per subject wins, so the dict
+    # overwrite replaces the per-trade membership test and comparison.
     most_recent_trades = {}
-    for trade in trades:
-        subject = trade.subject
-        if subject in most_recent_trades:
-            if trade.timestamp > most_recent_trades[subject].timestamp:
-                most_recent_trades[subject] = trade
-        else:
-            most_recent_trades[subject] = trade
+    for trade in sorted(trades, key=attrgetter('timestamp')):
+        most_recent_trades[trade.subject] = trade
     unique_most_recent_trades = list(most_recent_trades.values())
 
     logger.info(f"Identified {len(unique_most_recent_trades)} unique recent trades for share processing.")
 
-    contract = Contract()
-    existing_shares = await get_all_share_addresses(db)
-    shares_to_update, shares_to_create = [], []
-    for trade in unique_most_recent_trades:
-        address_str = "0x" + binascii.hexlify(trade.subject).decode()
-        balance = await scanner.get_balance(address_str)
+    contract = _shared_contract()
+
+    # One Multicall3 round-trip for all subject balances instead of one
+    # eth_getBalance RPC per trade; the known-address lookup is a DB query,
+    # so it runs concurrently with the balance fetch.
+    subject_addresses = [_hex_addr(trade.subject) for trade in unique_most_recent_trades]
+    existing_shares, balances = await asyncio.gather(
+        get_all_share_addresses(db),
+        scanner.get_balances(subject_addresses),
+    )
 
+    shares_to_update, shares_to_create = [], []
+    for trade, balance in zip(unique_most_recent_trades, balances):
         share_data = {
             'address': trade.subject,
             'last_transaction': trade.timestamp,
@@ -113,6 +135,12 @@ async def process_trades_to_shares(db: Database, scanner: Scanner, trades: List[
             share_data['registered'] = trade.timestamp
             shares_to_create.append(share_data)
 
+    return shares_to_update, shares_to_create
+
+
+async def persist_shares(db: Database, shares_to_update: List[dict], shares_to_create: List[dict]) -> None:
+    """Write the computed share payloads to the database"""
+
     logger.info(f"Updating {len(shares_to_update)} existing shares, and creating {len(shares_to_create)} new shares...")
 
     try:
@@ -131,41 +159,54 @@ async def process_trades_to_shares(db: Database, scanner: Scanner, trades: List[
 
 async def update_twitter_info(db: Database, max_attempts: int = 10):
     """Fetch shares twitter information"""
-    
-    friend_tech = FriendTech()
-    twitter_score = TwitterScore()
 
     shares = await get_shares_missing_twitter(db, 30)
     if not shares:
         logger.info("No shares missing Twitter data at this time.")
         return
-    
-    updated_shares = []
-    for share in shares:
-        address_str = "0x" + binascii.hexlify(share.address).decode()
-        attempt = 0
-        success = False
-        while attempt < max_attempts:
-            try:
-                friendtech_data = await friend_tech.get_info_from_address(address_str)
-                if friendtech_data is not None:
-                    twitter_data = await twitter_score.get_twitter_score(friendtech_data.get('twitterUsername'))
-                    share.twitter_username = friendtech_data.get('twitterUsername')
-                    share.twitter_name = friendtech_data.get('twitterName')
-                    share.rank = friendtech_data.get('rank')
-                    share.twitter_score = twitter_data.get('twitter_score') if twitter_data and twitter_data['success'] else 0
-                    updated_shares.append(share)
-                    success = True
-                    break
-                else:
+
+    async with FriendTech() as friend_tech, TwitterScore() as twitter_score:
+        updated_shares = await _fetch_twitter_info(friend_tech, twitter_score, shares, max_attempts)
+
+    if updated_shares:
+        await update_shares(db, updated_shares)
+        logger.info(f"Successfully updated Twitter information for {len(updated_shares)} shares.")
+    else:
+        logger.info("No shares were updated with new Twitter information.")
+
+
+async def _fetch_twitter_info(friend_tech: FriendTech, twitter_score: TwitterScore, shares: List[Share], max_attempts: int, concurrency: int = 20) -> List[Share]:
+    """Resolve twitter data for the shares concurrently, retrying transient failures"""
+
+    # Each share's lookups are independent network calls, so the shares are
+    # enriched in parallel (bounded by the semaphore to respect provider
+    # rate limits) instead of awaiting them back-to-back.
+    semaphore = asyncio.Semaphore(concurrency)
+    updated_shares: List[Share] = []
+
+    async def enrich(share: Share) -> None:
+        async with semaphore:
+            address_str = _hex_addr(share.address)
+            attempt = 0
+            while attempt < max_attempts:
+                try:
+                    friendtech_data = await friend_tech.get_info_from_address(address_str)
+                    if friendtech_data is not None:
+                        twitter_data = await twitter_score.get_twitter_score(friendtech_data.get('twitterUsername'))
+                        share.twitter_username = friendtech_data.get('twitterUsername')
+                        share.twitter_name = friendtech_data.get('twitterName')
+                        share.rank = friendtech_data.get('rank')
+                        share.twitter_score = twitter_data.get('twitter_score') if twitter_data and twitter_data['success'] else 0
+                        updated_shares.append(share)
+                        return
                     attempt += 1
                     logger.warning(f"Attempt {attempt} failed, FriendTech data is None for address {address_str}. Retrying...")
                     await asyncio.sleep(random.uniform(0.5, 1.5))
-            except Exception as e:
-                attempt += 1
-                logger.error(f"Attempt {attempt} failed due to exception: {str(e)}")
-                await asyncio.sleep(random.uniform(0.5, 1.5))
-        if not success:
+                except Exception as e:
+                    attempt += 1
+                    logger.error(f"Attempt {attempt} failed due to exception: {str(e)}")
+                    await asyncio.sleep(random.uniform(0.5, 1.5))
+
             logger.info(f"All attempts failed for address {address_str}, using default data.")
             share.twitter_username = "not_found"
             share.twitter_name = "Not Found"
@@ -173,8 +214,5 @@ async def update_twitter_info(db: Database, max_attempts: int = 10):
             share.twitter_score = 0
             updated_shares.append(share)
 
-    if updated_shares:
-        await update_shares(db, updated_shares)
-        logger.info(f"Successfully updated Twitter information for {len(updated_shares)} shares.")
-    else:
-        logger.info("No shares were updated with new Twitter information.")
\ No newline at end of file
+    await asyncio.gather(*(enrich(share) for share in shares))
+    return updated_shares
\ No newline at end of file